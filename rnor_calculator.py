@@ -1,51 +1,144 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 from datetime import datetime
-import re
 
-# ---- Helper Functions ----
+try:
+    from numba import njit
+except ImportError:  # JIT is optional; the NumPy broadcast is used instead
+    njit = None
 
-def safe_date_parse(date_str):
-    """Converts 'datetime.date(YYYY, M, D)' string to datetime object"""
-    match = re.match(r"datetime\.date\((\d+), (\d+), (\d+)\)", date_str)
-    if match:
-        y, m, d = map(int, match.groups())
-        return datetime(y, m, d)
-    return date_str  # return unchanged if not a string
+# ---- Helper Functions ----
 
 def fy_range(start_year, end_year):
     return [f"FY {y}-{str(y+1)[-2:]}" for y in range(start_year, end_year+1)]
 
+def fy_bounds(start_year, end_year):
+    """Ordinal days of 1 April and 31 March bounding each FY, without building datetimes"""
+    years = np.arange(start_year, end_year + 2, dtype=np.int64)
+    prev = years - 1
+    leap = (years % 4 == 0) & ((years % 100 != 0) | (years % 400 == 0))
+    # Ordinal of 1 January, plus the 90 (91 in leap years) days to 1 April
+    april_1 = 365 * prev + prev // 4 - prev // 100 + prev // 400 + 1 + 90 + leap
+    return april_1[:-1], april_1[1:] - 1
+
 def is_resident(stay_days):
     return stay_days >= 182
 
-def calc_days_in_india(travel_data, fy_start, fy_end):
-    total_days = 0
-    for trip in travel_data:
-        dep = trip.get("departure")
-        ret = trip.get("return")
+def merge_trips(trips):
+    """Sorts (departure, return) ordinal pairs and merges overlapping or adjacent trips"""
+    merged = []
+    for dep, ret in sorted(t for t in trips if t[0] < t[1]):
+        if merged and dep <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], ret)
+        else:
+            merged.append([dep, ret])
+    return merged
+
+def _days_in_india_loop(dep_ord, ret_ord, fy_starts, fy_ends):
+    """Integer-only overlap loop, kept free of datetime so Numba can compile it.
+
+    Expects disjoint trips sorted by departure (see merge_trips) and FYs in order.
+    """
+    n = dep_ord.shape[0]
+    days = np.empty(fy_starts.shape[0], dtype=np.int64)
+    lo = 0
+    for i in range(fy_starts.shape[0]):
+        fs = fy_starts[i]
+        fe = fy_ends[i]
+        # Trips that ended before this FY can't touch any later FY either
+        while lo < n and ret_ord[lo] < fs:
+            lo += 1
+        # Start from the full FY and take off each trip's clipped days abroad
+        outside = 0
+        for k in range(lo, n):
+            if dep_ord[k] > fe:
+                break
+            a = fs if dep_ord[k] < fs else dep_ord[k]
+            b = fe if ret_ord[k] > fe else ret_ord[k]
+            if b > a:
+                outside += b - a
+        days[i] = (fe - fs) - outside
+    return days
+
+_days_in_india_kernel = njit(cache=True)(_days_in_india_loop) if njit else None
+
+def calc_days_in_india(dep_ord, ret_ord, fy_starts, fy_ends):
+    """Days in India for every FY at once, all given as ordinal-day arrays"""
+    if _days_in_india_kernel is not None:
+        return _days_in_india_kernel(dep_ord, ret_ord, fy_starts, fy_ends)
+
+    fs = fy_starts[:, None]
+    fe = fy_ends[:, None]
+    # FY x trip matrix of days abroad; invalid or disjoint trips clip to 0
+    outside = np.clip(np.minimum(ret_ord[None, :], fe) - np.maximum(dep_ord[None, :], fs), 0, None)
+    return (fy_ends - fy_starts) - outside.sum(axis=1)
+
+@st.cache_data(show_spinner=False)
+def compute_report(trips, final_return_date):
+    """RNOR report for (departure, return) ordinal-day pairs and the final return date"""
+    # Generate financial years
+    start_fy = final_return_date.year - 10
+    end_fy = final_return_date.year + 3
+
+    fy_list = fy_range(start_fy, end_fy)
+    fy_starts, fy_ends = fy_bounds(start_fy, end_fy)
+
+    # Disjoint trips as ordinal-day arrays, so no day abroad is counted twice
+    merged = merge_trips(trips)
+    dep_ord = np.array([dep for dep, _ in merged], dtype=np.int64)
+    ret_ord = np.array([ret for _, ret in merged], dtype=np.int64)
+    fy_col, resident_col, days_col, rnor_col, reason_col = [], [], [], [], []
 
-        # Validate types
-        if not isinstance(dep, datetime) or not isinstance(ret, datetime):
-            continue
-        if dep >= ret:
-            continue
-        if ret < fy_start or dep > fy_end:
-            continue
+    # Days in India per FY, computed once; prefix sums give the 7-year window
+    days = calc_days_in_india(dep_ord, ret_ord, fy_starts, fy_ends)
+    # Plain bools, so the per-FY window updates below avoid NumPy scalar reads
+    resident_flags = is_resident(days).tolist()
+    pref = np.concatenate(([0], np.cumsum(days)))
+    nonres10 = 0
 
-        actual_depart = max(dep, fy_start)
-        actual_return = min(ret, fy_end)
-        days_outside = (actual_return - actual_depart).days
+    for i, fy in enumerate(fy_list):
+        days_in_india = int(days[i])
+        resident = resident_flags[i]
+
+        if i >= 1:
+            # Slide the preceding-10-years window: one FY enters, one may leave
+            incoming = resident_flags[i-1]
+            outgoing = resident_flags[i-11] if i >= 11 else None
+            if not incoming:
+                nonres10 += 1
+            if outgoing is not None and not outgoing:
+                nonres10 -= 1
+            nonres_10 = nonres10
+            stay_7yrs = int(pref[i] - pref[max(0, i-7)])
+        else:
+            nonres_10 = "-"
+            stay_7yrs = "-"
 
-        fy_days = (fy_end - fy_start).days
-        days_in_india = max(fy_days - days_outside, 0)
+        rnor = False
+        rnor_reason = ""
 
-        total_days += days_in_india
+        if resident:
+            if isinstance(nonres_10, int) and nonres_10 >= 9:
+                rnor = True
+                rnor_reason = f"Non-resident in {nonres_10} of last 10 years"
+            elif isinstance(stay_7yrs, int) and stay_7yrs <= 729:
+                rnor = True
+                rnor_reason = f"Stayed in India only {stay_7yrs} days in last 7 years"
 
-    return total_days
+        fy_col.append(fy)
+        resident_col.append("Yes" if resident else "No")
+        days_col.append(days_in_india)
+        rnor_col.append("Yes ✅" if rnor else "No ❌")
+        reason_col.append(rnor_reason if rnor else "-")
 
-def count_non_resident_years(flags):
-    return flags.count(False)
+    return pd.DataFrame({
+        "Financial Year": fy_col,
+        "Resident": resident_col,
+        "Days in India": np.asarray(days_col, dtype=np.int32),
+        "RNOR Eligible": rnor_col,
+        "Reason": reason_col
+    })
 
 # ---- Streamlit UI ----
 
@@ -68,72 +161,19 @@ with st.form("travel_form"):
         ret = st.date_input("Return to India", key=f"ret_{i}")
         if ret <= dep:
             st.warning(f"Return date must be after departure for trip #{i+1}")
-        travel_data.append({"departure": str(dep), "return": str(ret)})
+        travel_data.append({
+            "departure": datetime.combine(dep, datetime.min.time()),
+            "return": datetime.combine(ret, datetime.min.time()),
+        })
 
     final_return_date = st.date_input("Final return to India (for good):")
 
     submit = st.form_submit_button("Check RNOR Eligibility")
 
 if submit:
-    # Convert strings to datetime
-    for trip in travel_data:
-        if isinstance(trip["departure"], str):
-            trip["departure"] = safe_date_parse(trip["departure"])
-        if isinstance(trip["return"], str):
-            trip["return"] = safe_date_parse(trip["return"])
-
-    # Generate financial years
     st.header("📊 RNOR Status Report")
-    start_fy = final_return_date.year - 10
-    end_fy = final_return_date.year + 3
-
-    fy_list = fy_range(start_fy, end_fy)
-    resident_flags = []
-    results = []
-
-    for i, fy in enumerate(fy_list):
-        fy_start = datetime(start_fy + i, 4, 1)
-        fy_end = datetime(start_fy + i + 1, 3, 31)
-
-        days_in_india = calc_days_in_india(travel_data, fy_start, fy_end)
-        resident = is_resident(days_in_india)
-
-        if i >= 1:
-            preceding_10 = resident_flags[max(0, i-10):i]
-            preceding_7 = resident_flags[max(0, i-7):i]
-            nonres_10 = count_non_resident_years(preceding_10)
-            stay_7yrs = sum([
-                calc_days_in_india(travel_data,
-                                   datetime(start_fy + j, 4, 1),
-                                   datetime(start_fy + j + 1, 3, 31))
-                for j in range(max(0, i-7), i)
-            ])
-        else:
-            nonres_10 = "-"
-            stay_7yrs = "-"
-
-        rnor = False
-        rnor_reason = ""
-
-        if resident:
-            if isinstance(nonres_10, int) and nonres_10 >= 9:
-                rnor = True
-                rnor_reason = f"Non-resident in {nonres_10} of last 10 years"
-            elif isinstance(stay_7yrs, int) and stay_7yrs <= 729:
-                rnor = True
-                rnor_reason = f"Stayed in India only {stay_7yrs} days in last 7 years"
-
-        results.append({
-            "Financial Year": fy,
-            "Resident": "Yes" if resident else "No",
-            "Days in India": days_in_india,
-            "RNOR Eligible": "Yes ✅" if rnor else "No ❌",
-            "Reason": rnor_reason if rnor else "-"
-        })
-
-        resident_flags.append(resident)
-
-    st.dataframe(pd.DataFrame(results))
+    trips = tuple((t["departure"].toordinal(), t["return"].toordinal()) for t in travel_data)
+    st.dataframe(compute_report(trips, final_return_date))
 
     st.markdown("""
 ---